@@ -44,20 +44,42 @@ PARMS = dict(
   titlesize = 30,
   attrfont = "/Arial",
   attrsize = 12,
+  # directory to save drawings between runs, None to disable
+  cachedir = "~/.cache/lsys",
 )
 
 #------------------------------------------------------------------------------
 # imports and abbreviations
 
 import math
+import array
+import itertools
+import concurrent.futures
 import sys
+import os
 import datetime
+import gzip
+import hashlib
+import pickle
 import pprint
 pp = pprint.PrettyPrinter(indent=4).pprint
 
 def die(str_msg):
   raise Exception(str_msg)
 
+class Memo(dict) :
+  """
+    Dictionary that fills in a missing value by calling func(key), so each
+    value is computed only once.  Lookups of values already present stay in
+    C, for example in map(memo.__getitem__, keys).
+  """
+  def __init__(self,func) :
+    self._func = func
+
+  def __missing__(self,key) :
+    value = self[key] = self._func(key)
+    return value
+
 #------------------------------------------------------------------------------
 # Adobe Document Structuring Conventions for postscript
 
@@ -68,13 +90,14 @@ class AdobeDSC :
   """
     Accept one page at a time and write to output stream.
     Add DSC at beginning of document and for each page.
+    Pages are written as they come, a chunk at a time, and are not kept.
+    Give a large buffer to the output stream to keep writes few.
   """
   def __init__(self,title,npages,ostream) :
 
     self._npages = npages
     self._page = 1
     self._ostream = ostream
-    self._out = []
 
     # doc prefix
     pbb = (0,0,PARMS['pagewidth'],PARMS['pageheight'])
@@ -89,25 +112,22 @@ class AdobeDSC :
       f"%%Pages: {npages}\n"
       f"%%EndComments\n"
     )
-    self._out += [doc_prefix]
+    self._ostream.write(doc_prefix)
 
   def AddPage(self,ps) :
     """
       emit page prefix
-      emit page data
+      emit page data, from any iterable of strings
       show page
       count pages
     """
     page_prefix = (
-      f"\n%%Page: {self._page} {self._npages}\n"
+      f"\n%%Page: {self._page} {self._page}\n"
     )
-    out = self._out
-    out += [page_prefix]
-    out += ps
-    out += ["\nshowpage\n"]
-    sout = "".join(out)
-    self._ostream.write(sout)
-    self._out = []
+    out = self._ostream
+    out.write(page_prefix)
+    out.writelines(ps)
+    out.write("\nshowpage\n")
     self._page += 1
 
   def Finish(self) :
@@ -141,7 +161,27 @@ class AdobeDSC :
   Postscript is generated to draw the LSys.
 """
 
+# saved drawings are only good for the exact source that drew them,
+# so any edit to this file makes old saved drawings be ignored
+with open(__file__,'rb') as f:
+  DRAW_CACHE_SOURCE = hashlib.blake2b(f.read()).hexdigest()
+
 class LSys :
+
+  # postscript before and after the drawing in DrawBasic
+  _PROLOG_TMPL = (
+    "\n%DrawBasic({order},({px0},{py0},{px1},{py1}))\n"
+    "gsave\n"
+    "newpath\n"
+    "{x} {y} moveto\n"
+    "{scale} dup scale\n"
+    "{lw_over_scale} setlinewidth\n"
+  )
+  _EPILOG = (
+    "stroke\n"
+    "grestore\n"
+  )
+
   def __init__(self,**props) :
     self._Title = props['Title']
 
@@ -152,30 +192,100 @@ class LSys :
     self._Rules['Order'] = rules.get('Order',[1,2,3,6])
     if 'Order' in rules : del rules['Order']
     self._Rules.update(rules)
+    # turning angle in radians
+    self._angle_rad = self._Rules['Angle'] * math.pi / 180.0
 
     self._Refs = props.get('Refs',[])
     self._PostRules = props.get('PostRules',{})
 
+    # layout boxes, with page size they were made for
+    self._boxes = None
+
     # all possible actions
     self._actions = "Ff+-[]|"
     # all actions that perform drawing
     self._drawing_actions = "F"
+    # translation table to delete all non-action characters (latin-1 only)
+    self._minimize_table = str.maketrans('','',
+      ''.join(chr(i) for i in range(256) if chr(i) not in self._actions))
+
+    # rule elaborations already done, by order, with and without post rules
+    # LSys strings are kept as latin-1 bytes, from elaboration to drawing
+    self._start = self._Rules['Start'].encode('latin-1')
+    self._elab_cache = {0: self._start}
+    self._post_cache = {}
+
+    # substitution tables for rules and post rules
+    self._rules_table = self.RuleTable(self._Rules)
+    self._post_table = self.RuleTable(self._PostRules)
+
+    # Tables to fuse last rule substitution, post rule substitution and
+    # minimize into one pass.  Keys are every character that can occur.
+    alphabet = set(self._Rules['Start'])
+    for k,v in self._Rules.items():
+      if 1 == len(k) : alphabet.update(k,v)
+    def post(s) :
+      s = self.ElabCore(self._post_table,s.encode('latin-1'),1)
+      return self.Minimize(s.decode('latin-1'))
+    self._min_post = self.RuleTable(
+      {c : post(c) for c in alphabet})
+    self._min_rules = self.RuleTable(
+      {c : post(self._Rules.get(c,c)) for c in alphabet})
+
+  def RuleTable(self,rules) :
+    """
+      Make substitution table for ElabCore from dictionary of rules.  The
+      table has an entry for each of the 256 byte values, giving the rule
+      substitution if a rule, else the byte itself.
+    """
+    table = [bytes((i,)) for i in range(256)]
+    for k,v in rules.items():
+      if 1 == len(k) : table[ord(k)] = v.encode('latin-1')
+    return table
+
+  def ElabCore(self,table,start,order) :
+    """
+      Walk the string of bytes once per order.  Each byte indexes the
+      substitution table made by RuleTable.  Join into new string.
 
-  def ElabCore(self,rules,start,order) :
+      If no substitution is longer than one character, as for most post
+      rules, the table is turned into a translate table and delete set,
+      so each order is a single bytes.translate.
     """
-      Use two lists.  Remove item from 'old' list,
-      if a rule, then do rule substitution
-      append to 'new' list
+    s = start
+    if all(len(v) <= 1 for v in table) :
+      trans = bytes(v[0] if v else i for (i,v) in enumerate(table))
+      delete = bytes(i for (i,v) in enumerate(table) if not v)
+      for _ in range(order):
+        s = s.translate(trans,delete)
+    else :
+      for _ in range(order):
+        s = b''.join(map(table.__getitem__,s))
+    return s
+
+
+  def RulesOrder(self, order) :
     """
-    new = list(start)
-    for _ in range(order):
-      old = new
-      new = []
-      while old != []:
-        c = old.pop(0)
-        new += list(rules.get(c,c))
-    return ''.join(new)
+      Number of rule substitutions to elaborate LSys to specified order.
+      If the start string does drawing, one is subtracted from the order.
+    """
+    drawset = set(self._drawing_actions)
+    startset = set(self._Rules['Start'])
+    if 0 < len(drawset.intersection(startset)) :
+      order -= 1
+    return max(order,0)
 
+  def ElabRules(self, order) :
+    """
+      Do rule substitution to specified order, continuing from highest order
+      already done.
+    """
+    cache = self._elab_cache
+    k = max(i for i in cache if i <= order)
+    ecore = cache[k]
+    for i in range(k+1,order+1):
+      ecore = cache[i] = self.ElabCore(self._rules_table,ecore,1)
+    return ecore
 
   def Elaborate(self, order) :
     """
@@ -189,34 +299,39 @@ class LSys :
     sources that presume implicit drawing on rules other than F.
     """
 
-    # decrement order if start does drawing action
-    drawset = set(self._drawing_actions)
-    startset = set(self._Rules['Start'])
-    if 0 < len(drawset.intersection(startset)) :
-      order -= 1
+    # do rule substitution
+    order = self.RulesOrder(order)
+    ecore = self.ElabRules(order)
 
-    # do rule substition
-    ecore = self.ElabCore(self._Rules,self._Rules['Start'],order)
-
-    # do post rule substitution
-    # FIXME this is slower than it should be, remove this special case
+    # do post rule substitution, once for each order
+    # FIXME remove this special case
     pr = self._PostRules
     if 0 != len(pr) :
-      epost = self.ElabCore(pr,ecore,1)
+      epost = self._post_cache.get(order)
+      if epost is None :
+        epost = self.ElabCore(self._post_table,ecore,1)
+        self._post_cache[order] = epost
     else:
       epost = ecore
-    return epost
+    return epost.decode('latin-1')
 
   def Minimize(self,s) :
     """
       Remove all non-action characters from LSys string.
     """
-    s1 = []
-    for c in s:
-      if c in self._actions:
-        s1 += [c]
-    smin = "".join(s1)
-    return smin
+    return s.translate(self._minimize_table)
+
+  def ElaborateMinimized(self, order) :
+    """
+      Same as Minimize(Elaborate(order)), without building the full
+      elaborated string.  The last rule substitution, the post rule
+      substitution and the minimize are done together in one pass.
+      Returns bytes, ready for DrawCore.
+    """
+    order = self.RulesOrder(order)
+    if 0 == order :
+      return self.ElabCore(self._min_post,self._start,1)
+    return self.ElabCore(self._min_rules,self.ElabRules(order-1),1)
 
   def DrawCore(self,actions) :
     """
@@ -225,42 +340,76 @@ class LSys :
       be (0,0). This requires separate, earlier, definition of actual starting
       position and scale.
 
+      The action string may be str or latin-1 bytes.
+
       Returns postscript as list of strings and bounding box in steps.
     """
+    if isinstance(actions,str) :
+      actions = actions.encode('latin-1')
+
+    # use the fast path if possible, only for a positive angle that
+    # divides a full turn into a whole number of steps
+    if self._Rules['Angle'] > 0 :
+      turns = 360.0 / self._Rules['Angle']
+      nturn = round(turns)
+      if nturn >= 1 and abs(turns-nturn) < 1e-9 :
+        if set(actions) <= set(b"F+-|") :
+          return self.DrawCoreFlat(actions,nturn)
+
     stack = []
     ps = []
-    # direction and angle step
-    d = 0.0
-    angle = self._Rules['Angle'] * math.pi / 180.0
-    # current position and bounding box
-    x = y = x0 = y0 = x1 = y1 = 0.0
-    # do the actions
-    for action in actions:
-      # forward
-      if "F" == action:
-        xs = math.cos(d);   ys = math.sin(d)
-        xs = round(xs,15);  ys = round(ys,15)
+    ps_append = ps.append
+    # direction as twice the count of turns, plus one if reversed
+    k = 0
+    angle = self._angle_rad
+    cos = math.cos;  sin = math.sin
+    # step and postscript for a run of n forward actions in direction k,
+    # computed once for each (k,n),
+    # steps rounded so that axis directions have exact zero components
+    def step(kn) :
+      (k,n) = kn
+      d = (k >> 1) * angle
+      xs = round(cos(d),15);  ys = round(sin(d),15)
+      if k & 1 : xs = -xs;  ys = -ys
+      xs *= n;  ys *= n
+      return (xs, ys, f"{xs:.15g} {ys:.15g} rlineto\n")
+    steps = Memo(step)
+    # current position, and all positions reached for bounding box
+    x = y = 0.0
+    xa = array.array('d',[x]);  xa_append = xa.append
+    ya = array.array('d',[y]);  ya_append = ya.append
+    # action codes
+    (FWD,LEFT,RIGHT,PUSH,POP,REV) = b"F+-[]|"
+    # do the actions, a run of repeated actions at a time
+    for (action,run) in itertools.groupby(actions):
+      n = len(list(run))
+      # forward, one line for whole run
+      if FWD == action:
+        (xs,ys,line) = steps[k,n]
         x  += xs;           y  += ys
-        x  = round(x,15);   y  = round(y,15)
-        ps += [f"{xs} {ys} rlineto\n"]
-      elif "+" == action:
-        d += angle
-      elif "-" == action:
-        d -= angle
-      elif "[" == action:
-        stack.append((d,x,y))
-      elif "]" == action:
-        (d,xp,yp) = stack.pop()
-        ps += [f"{xp-x} {yp-y} rmoveto\n"]
+        xa_append(x);       ya_append(y)
+        ps_append(line)
+      elif LEFT == action:
+        k += 2*n
+      elif RIGHT == action:
+        k -= 2*n
+      elif PUSH == action:
+        stack.extend([(k,x,y)] * n)
+      elif POP == action:
+        # one move for whole run, to last state popped
+        if n > len(stack) : die("Unbalanced ']' in action string")
+        del stack[len(stack)-n+1:]
+        (k,xp,yp) = stack.pop()
+        ps_append(f"{xp-x:.15g} {yp-y:.15g} rmoveto\n")
         x = xp;  y = yp;
-      elif "|" == action:
-        d += math.pi
+      elif REV == action:
+        k ^= n & 1
       else:
-        die(f"Unimplemented action: '{action}'")
+        die(f"Unimplemented action: '{chr(action)}'")
 
-      # maintain bounding box
-      x0 = min(x0,x);     y0 = min(y0,y)
-      x1 = max(x1,x);     y1 = max(y1,y)
+    # bounding box, a pop only returns to a position already reached
+    x0 = min(xa);  y0 = min(ya)
+    x1 = max(xa);  y1 = max(ya)
 
     # adjust bounding box so it can't have zero size
     # treat as if it has 1 step, keep center at zero
@@ -269,6 +418,95 @@ class LSys :
 
     return (ps,(x0,y0,x1,y1))
 
+  def DrawCoreFlat(self,actions,nturn) :
+    """
+      Same as DrawCore, but only for action bytes without any stack
+      actions, and for an angle that divides a full turn into a whole number
+      (nturn) of steps.  Then direction is just an index into a table of
+      directions, and all the work can be done as a pipeline of iterators,
+      with no python code run per action.
+    """
+    # If nturn is odd, reverse is not a whole number of turns, so the
+    # table has a direction for every half turn instead.
+    unit = 1 if 0 == nturn % 2 else 2
+    ndir = unit * nturn
+    angle = self._angle_rad / unit
+    # step for each direction, rounded as in DrawCore
+    cx = [round(math.cos(k*angle),15) for k in range(ndir)]
+    cy = [round(math.sin(k*angle),15) for k in range(ndir)]
+    # step and postscript for a run of n forward actions in direction d,
+    # computed once for each (d,n)
+    runx = Memo(lambda dn : cx[dn[0]] * dn[1])
+    runy = Memo(lambda dn : cy[dn[0]] * dn[1])
+    text = Memo(lambda dn : f"{runx[dn]:.15g} {runy[dn]:.15g} rlineto\n")
+    # change of direction for each action, and which actions draw
+    turn = [0] * 256
+    turn[ord("+")] = unit
+    turn[ord("-")] = -unit
+    turn[ord("|")] = ndir // 2
+    draws = [False] * 256
+    draws[ord("F")] = True
+    # direction at each forward action
+    dirs = itertools.accumulate(map(turn.__getitem__, actions))
+    fdirs = itertools.compress(dirs, map(draws.__getitem__, actions))
+    di = map(ndir.__rmod__, fdirs)
+    # runs of forward actions in same direction, one line for each run
+    runs = [(d,len(list(run))) for (d,run) in itertools.groupby(di)]
+    ps = list(map(text.__getitem__, runs))
+    # positions and bounding box
+    accumulate = itertools.accumulate
+    xp = array.array('d', accumulate(map(runx.__getitem__, runs), initial=0.0))
+    yp = array.array('d', accumulate(map(runy.__getitem__, runs), initial=0.0))
+    x0 = min(xp);  y0 = min(yp)
+    x1 = max(xp);  y1 = max(yp)
+
+    # adjust bounding box so it can't have zero size
+    if x0==x1 : x0 = -0.5;  x1 = +0.5
+    if y0==y1 : y0 = -0.5;  y1 = +0.5
+
+    return (ps,(x0,y0,x1,y1))
+
+  def DrawCached(self, order) :
+    """
+      Same as DrawCore(ElaborateMinimized(order)), but the result is saved
+      on disk.  Later runs with the same rules and order just load it.
+    """
+    cachedir = PARMS['cachedir']
+    if cachedir is None :
+      return self.DrawCore(self.ElaborateMinimized(order))
+
+    # name saved file by hash of everything that determines the drawing
+    key = repr((
+      DRAW_CACHE_SOURCE,
+      sorted(self._Rules.items()),
+      sorted(self._PostRules.items()),
+      order,
+    ))
+    name = hashlib.blake2b(key.encode()).hexdigest()
+    cachedir = os.path.expanduser(cachedir)
+    path = os.path.join(cachedir, name + ".pkl")
+    try:
+      with open(path,"rb") as f:
+        return pickle.load(f)
+    except (OSError,EOFError,pickle.UnpicklingError):
+      pass
+
+    # draw and save, replace atomically in case of concurrent runs,
+    # failure to save just means drawing again next run
+    result = self.DrawCore(self.ElaborateMinimized(order))
+    tmp = f"{path}.{os.getpid()}"
+    try:
+      os.makedirs(cachedir, exist_ok=True)
+      with open(tmp,"wb") as f:
+        pickle.dump(result, f, pickle.HIGHEST_PROTOCOL)
+      os.replace(tmp,path)
+    except OSError:
+      try:
+        os.remove(tmp)
+      except OSError:
+        pass
+    return result
+
   def DrawBasic(self, order, pbb) :
     """
       Produce postscript to draw LSys at specified order to fit in specified
@@ -277,9 +515,7 @@ class LSys :
       Returns postscript as a list of strings
     """
     (px0,py0,px1,py1) = pbb
-    elab = self.Elaborate(order)
-    actions = self.Minimize(elab)
-    (pscore,abb) = self.DrawCore(actions)
+    (pscore,abb) = self.DrawCached(order)
     (ax0,ay0,ax1,ay1) = abb
 
     # find scale factor
@@ -296,16 +532,12 @@ class LSys :
 
     # make postscript
     lw = PARMS['linewidth']
-    ps = []
-    ps += [f"\n%DrawBasic({order},({px0},{py0},{px1},{py1}))\n"]
-    ps += [f"gsave\n"]
-    ps += [f"newpath\n"]
-    ps += [f"{x} {y} moveto\n"]
-    ps += [f"{scale} dup scale\n"]
-    ps += [f"{lw/scale} setlinewidth\n"]
-    ps += pscore
-    ps += [f"stroke\n"]
-    ps += [f"grestore\n"]
+    ps = [self._PROLOG_TMPL.format(
+      order=order, px0=px0, py0=py0, px1=px1, py1=py1,
+      x=x, y=y, scale=scale, lw_over_scale=lw/scale,
+    )]
+    ps.extend(pscore)
+    ps.append(self._EPILOG)
     return ps
 
   def LayoutBoxes(self):
@@ -340,6 +572,11 @@ class LSys :
     |                                   |
     +---------------0-------------------+
     """
+    # boxes only depend on page size, compute once for each page size
+    psize = (PARMS['pagewidth'],PARMS['pageheight'])
+    if self._boxes is not None and self._boxes[0] == psize :
+      return self._boxes[1]
+
     # all box edges as fraction of page size
     #      0     1     2     3    4
     xf = [0.05, 0.35, 0.23, 0.65, 0.95]
@@ -357,6 +594,7 @@ class LSys :
       b = (x[2],y[2],x[4],y[3]),
       t = (x[0],y[3],x[4],y[4]),
     )
+    self._boxes = (psize,bb)
     return bb
 
   def DrawFancy(self):
@@ -372,7 +610,7 @@ class LSys :
       psb = self.DrawBoxOutlines()
     else:
       psb = []
-    return psl+psc+psr+psm+pst+psb
+    return list(itertools.chain(psl,psc,psr,psm,pst,psb))
 
   def pdfmark(self,bb,link):
     ps = [
@@ -406,67 +644,68 @@ class LSys :
     bbs = self.LayoutBoxes()
     (x0,y0,x1,y1) = bbs['t']
     ps = []
-    ps += ["\n%DrawTop\n"]
-    ps += ["gsave\n"]
+    ps.append("\n%DrawTop\n")
+    ps.append("gsave\n")
 
     # Title
     tf = PARMS['titlefont']
     ts = PARMS['titlesize']
     t = self._Title
-    ps += [f"{tf} findfont\n"]
-    ps += [f"{ts} scalefont setfont\n"]
-    ps += [f"{x1-x0} ({t}) stringwidth pop sub 2 div\n"]
-    ps += [f"{y1-ts} moveto\n"]
-    ps += [f"({t}) show\n"]
+    ps.append(f"{tf} findfont\n")
+    ps.append(f"{ts} scalefont setfont\n")
+    ps.append(f"{x1-x0} ({t}) stringwidth pop sub 2 div\n")
+    ps.append(f"{y1-ts} moveto\n")
+    ps.append(f"({t}) show\n")
 
     # References
     atf = PARMS['attrfont']
     ats = PARMS['attrsize']
-    ps += [f"{atf} findfont\n"]
-    ps += [f"{ats} scalefont setfont\n"]
+    ps.append(f"{atf} findfont\n")
+    ps.append(f"{ats} scalefont setfont\n")
     x = x0
     y = y1-ts-ats
     for ref in self._Refs:
       y -= ats
-      ps += [f"{x} {y} moveto\n"]
-      ps += [f"({ref}) show\n"]
-      ps += self.pdfmark([x,y,0,y+ats],ref)
+      ps.append(f"{x} {y} moveto\n")
+      ps.append(f"({ref}) show\n")
+      ps.extend(self.pdfmark([x,y,0,y+ats],ref))
 
     # Rules a
     an = 2
+    items = list(self._Rules.items())
     (x0,y0,x1,y1) = bbs['a']
-    ps += [f"{x0} {y1} moveto\n"]
-    for k,v in list(self._Rules.items())[:an]:
-      ps += [f"0.0 {-ats} rmoveto\n"]
-      ps += [f"({k} : {v}) gsave show grestore\n"]
+    ps.append(f"{x0} {y1} moveto\n")
+    for k,v in items[:an]:
+      ps.append(f"0.0 {-ats} rmoveto\n")
+      ps.append(f"({k} : {v}) gsave show grestore\n")
 
     # Rules b
     (x0,y0,x1,y1) = bbs['b']
-    ps += [f"{x0} {y1} moveto\n"]
-    for k,v in list(self._Rules.items())[an:]:
-      ps += [f"0.0 {-ats} rmoveto\n"]
-      ps += [f"({k} : {v}) gsave show grestore\n"]
+    ps.append(f"{x0} {y1} moveto\n")
+    for k,v in items[an:]:
+      ps.append(f"0.0 {-ats} rmoveto\n")
+      ps.append(f"({k} : {v}) gsave show grestore\n")
 
-    ps += ["grestore\n"]
+    ps.append("grestore\n")
     return ps
 
   def DrawBoxOutlines(self):
     ps = []
-    ps += ["\n%DrawBoxOutlines\n"]
-    ps += ["gsave\n"]
+    ps.append("\n%DrawBoxOutlines\n")
+    ps.append("gsave\n")
     lw = PARMS['linewidth']
-    ps += [f"{lw} setlinewidth\n"]
-    ps += [f"1 setlinejoin\n"]
+    ps.append(f"{lw} setlinewidth\n")
+    ps.append(f"1 setlinejoin\n")
     for bb in self.LayoutBoxes().values():
       (x0,y0,x1,y1) = bb
-      ps += [f"newpath\n"]
-      ps += [f"{x0} {y0} moveto\n"]
-      ps += [f"{x0} {y1} lineto\n"]
-      ps += [f"{x1} {y1} lineto\n"]
-      ps += [f"{x1} {y0} lineto\n"]
-      ps += [f"{x0} {y0} lineto\n"]
-      ps += [f"closepath stroke\n"]
-    ps += ["grestore\n"]
+      ps.append(f"newpath\n")
+      ps.append(f"{x0} {y0} moveto\n")
+      ps.append(f"{x0} {y1} lineto\n")
+      ps.append(f"{x1} {y1} lineto\n")
+      ps.append(f"{x1} {y0} lineto\n")
+      ps.append(f"{x0} {y0} lineto\n")
+      ps.append(f"closepath stroke\n")
+    ps.append("grestore\n")
     return ps
 
 #------------------------------------------------------------------------------
@@ -708,8 +947,14 @@ def TestElab() :
 # Curves passed as dictionary of LSys.
 
 
-def DoCurves(curves) :
+def DrawPage(lsys) :
+  # module level, so it can be run in a worker process
+  # return one string, much faster to send back than a list of lines
+  return "".join(lsys.DrawFancy())
+
+def DoCurves(curves,compress=False) :
   # input is a dictionary of lsys objects
+  # optionally write gzip compressed output
   # get path
   npages = len(curves)
   if 1 == npages :
@@ -717,20 +962,25 @@ def DoCurves(curves) :
     opath = list(curves.keys())[0].lower()
   else :
     opath = "lsys-examples"
-  ostream = open(opath +".ps","w")
+  if compress :
+    ostream = gzip.open(opath +".ps.gz","wt",compresslevel=6)
+  else :
+    ostream = open(opath +".ps","w",buffering=1<<20)
   title = "Lindenmayer System Examples"
   dsc = AdobeDSC(title,npages,ostream)
-  # iterate over curves
-  for lsys in curves.values():
-    ps = lsys.DrawFancy()
-    dsc.AddPage(ps)
+  # draw curves in parallel worker processes, add pages in order
+  with concurrent.futures.ProcessPoolExecutor() as ex :
+    for page in ex.map(DrawPage,curves.values()) :
+      dsc.AddPage([page])
   dsc.Finish()
   ostream.close()
 
 #------------------------------------------------------------------------------
 # Top level code
 
-DoCurves(Curves)
+# guarded, as worker processes may import this module
+if __name__ == "__main__" :
+  DoCurves(Curves)
 
 
 